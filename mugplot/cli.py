@@ -1,27 +1,136 @@
 """CLI for the mug plotter: convert, stream, run, status, reset."""
 
 import argparse
+import hashlib
+import os
+import re
 import sys
+from dataclasses import asdict
 from pathlib import Path
 
-from .config import load_config
-from .svg_to_gcode import svg_to_gcode, convert_file, check_gcode_bounds
-from .streamer import GCodeStreamer, load_gcode
+from .config import MachineConfig, load_config
+
+# The converter (svgpathtools, scipy) and streamer (pyserial) modules are
+# imported inside the commands that use them, so e.g. `status` starts fast.
+
+
+# find-dock jog command: y+, y-, z+, z-, optionally followed by a distance
+_JOG_RE = re.compile(r"([yz])([+-])(\d*\.?\d*)")
+
+
+# Conversion cache bound; least recently used entries go first
+_CACHE_MAX_BYTES = 64 << 20
+
+# MachineConfig fields that change how GCode is produced, not what it is
+_CACHE_IGNORED_FIELDS = frozenset({"parallel_threshold"})
+
+
+def _cache_dir() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "mugplot"
+
+
+def _prune_cache(cache_dir: Path, max_bytes: int = _CACHE_MAX_BYTES):
+    """Delete the least recently used cache files beyond max_bytes in total.
+
+    Counts every file in the directory, so temp files left by a killed
+    process age out like entries do.
+    """
+    entries = []
+    for path in cache_dir.iterdir():
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+    entries.sort(reverse=True)
+    total = 0
+    for _, size, path in entries:
+        total += size
+        if total > max_bytes:
+            path.unlink(missing_ok=True)
+
+
+def _cache_key(svg_path: str | Path, mc: MachineConfig) -> str:
+    """Hash of everything the converted GCode depends on.
+
+    Includes the converter source so a code change never serves stale output.
+    """
+    h = hashlib.sha256()
+    h.update(Path(svg_path).read_bytes())
+    fields = {k: v for k, v in asdict(mc).items() if k not in _CACHE_IGNORED_FIELDS}
+    h.update(repr(fields).encode())
+    h.update((Path(__file__).parent / "svg_to_gcode.py").read_bytes())
+    return h.hexdigest()
+
+
+def _cached_convert(svg_path: str | Path, mc: MachineConfig) -> tuple[list[str], list[str]]:
+    """svg_to_gcode with bounds check, memoized on disk by content hash of the SVG and config.
+
+    Returns (gcode, violations). Cached GCode is re-checked on load. A hit
+    refreshes the entry's mtime, which is what _prune_cache evicts by.
+    Caching is best-effort: any OSError along the way (no key because the
+    converter source isn't installed, an unwritable cache) just converts.
+    """
+    from .svg_to_gcode import check_gcode_bounds, svg_to_gcode
+
+    cache_path = None
+    try:
+        cache_path = _cache_dir() / f"{_cache_key(svg_path, mc)}.gcode"
+        gcode = cache_path.read_text().splitlines()
+    except OSError:
+        pass
+    else:
+        try:
+            os.utime(cache_path)
+        except OSError:
+            pass
+        return gcode, check_gcode_bounds(gcode, mc)
+
+    gcode, violations = svg_to_gcode(svg_path, mc, check_bounds=True)
+    if cache_path is None:
+        return gcode, violations
+    tmp = cache_path.with_suffix(f".tmp{os.getpid()}")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_text("\n".join(gcode) + "\n")
+        tmp.replace(cache_path)
+        _prune_cache(cache_path.parent)
+    except OSError:
+        try:
+            tmp.unlink(missing_ok=True)
+        except OSError:
+            pass
+    return gcode, violations
+
+
+# Every possible 50-column progress bar, indexed by pct // 2
+_BARS = ["#" * i + "-" * (50 - i) for i in range(51)]
 
 
 def _progress(sent: int, total: int):
+    # Redraw every 16th line (and the last); plenty for a human, 1/16 the tty writes
+    if sent & 15 and sent != total:
+        return
     pct = sent * 100 // total if total else 100
-    bar = "#" * (pct // 2) + "-" * (50 - pct // 2)
-    print(f"\r[{bar}] {sent}/{total} ({pct}%)", end="", flush=True)
+    print(f"\r[{_BARS[pct // 2]}] {sent}/{total} ({pct}%)", end="", flush=True)
 
 
 def cmd_convert(args, config):
+    from .svg_to_gcode import convert_file
+
     output = convert_file(args.input, args.output, config.machine)
     print(f"Wrote {output}")
 
 
 def cmd_stream(args, config):
-    gcode = load_gcode(args.input)
+    from .streamer import GCodeStreamer, load_gcode
+
+    try:
+        gcode = load_gcode(args.input)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
     print(f"Loaded {len(gcode)} lines from {args.input}")
 
     streamer = GCodeStreamer(config.serial)
@@ -34,9 +143,10 @@ def cmd_stream(args, config):
 
     print()  # newline after progress bar
     print(f"Sent {result.lines_sent} lines in {result.elapsed:.1f}s")
-    if result.errors:
-        print(f"Errors ({len(result.errors)}):")
-        for e in result.errors:
+    errors = result.errors
+    if errors:
+        print(f"Errors ({len(errors)}):")
+        for e in errors:
             print(f"  {e}")
     if result.completed:
         print("Done.")
@@ -46,14 +156,13 @@ def cmd_stream(args, config):
 
 
 def cmd_check(args, config):
-    gcode = svg_to_gcode(args.input, config.machine)
+    gcode, violations = _cached_convert(args.input, config.machine)
     x_max = config.machine.origin_x + config.machine.bed_width
     y_max = config.machine.origin_y + config.machine.bed_height
     print(f"Envelope: X[{config.machine.origin_x}, {x_max}] Y[{config.machine.origin_y}, {y_max}]")
     print(f"Z: up={config.machine.z_pen_up} down={config.machine.z_pen_down}")
     print(f"Generated {len(gcode)} GCode lines")
 
-    violations = check_gcode_bounds(gcode, config.machine)
     if violations:
         print(f"VIOLATIONS ({len(violations)}):")
         for v in violations:
@@ -64,10 +173,12 @@ def cmd_check(args, config):
 
 
 def cmd_run(args, config):
-    print(f"Converting {args.input}...")
-    gcode = svg_to_gcode(args.input, config.machine)
+    from .streamer import GCodeStreamer
 
-    violations = check_gcode_bounds(gcode, config.machine)
+    # Convert and bounds-check before touching the port: opening it toggles
+    # DTR/RTS, which reboots an ESP32 controller and loses homing.
+    print(f"Converting {args.input}...")
+    gcode, violations = _cached_convert(args.input, config.machine)
     if violations:
         print(f"WARNING: {len(violations)} out-of-bounds coordinate(s):")
         for v in violations:
@@ -76,11 +187,7 @@ def cmd_run(args, config):
         sys.exit(1)
 
     # Strip comments for streaming
-    cleaned = []
-    for line in gcode:
-        stripped = line.split(";")[0].strip()
-        if stripped:
-            cleaned.append(stripped)
+    cleaned = [stripped for line in gcode if (stripped := line.partition(";")[0].strip())]
 
     print(f"Generated {len(cleaned)} GCode lines")
 
@@ -91,9 +198,8 @@ def cmd_run(args, config):
 
     print()
     print(f"Sent {result.lines_sent} lines in {result.elapsed:.1f}s")
-    if result.errors:
-        for e in result.errors:
-            print(f"  {e}")
+    for e in result.errors:
+        print(f"  {e}")
     if result.completed:
         print("Done.")
     else:
@@ -102,6 +208,8 @@ def cmd_run(args, config):
 
 
 def cmd_find_dock(args, config):
+    from .streamer import GCodeStreamer
+
     mc = config.machine
     sc = config.serial
 
@@ -123,6 +231,8 @@ def cmd_find_dock(args, config):
     print()
 
     step = 1.0
+    travel_speed = mc.travel_speed
+    z_travel_speed = mc.z_travel_speed
 
     while True:
         try:
@@ -174,15 +284,14 @@ def cmd_find_dock(args, config):
             continue
 
         # Jog commands: y+, y-, z+, z-, y+N, y-N, z+N, z-N
-        import re as _re
-        m = _re.fullmatch(r"([yz])([+-])(\d*\.?\d*)", low)
+        m = _JOG_RE.fullmatch(low)
         if m:
             axis = m.group(1).upper()
             sign = 1.0 if m.group(2) == "+" else -1.0
             dist_str = m.group(3)
             dist = float(dist_str) if dist_str else step
-            speed = mc.z_travel_speed if axis == "Z" else mc.travel_speed
-            jog = f"$J=G91 {axis}{sign * dist:.3f} F{mc.travel_speed if axis == 'Y' else mc.z_travel_speed:.0f}"
+            speed = z_travel_speed if axis == "Z" else travel_speed
+            jog = f"$J=G91 {axis}{sign * dist:.3f} F{speed:.0f}"
             ok, resp = streamer.send_command(jog)
             if not ok:
                 print(f"Jog error: {resp}")
@@ -199,6 +308,8 @@ def cmd_find_dock(args, config):
 
 
 def cmd_status(args, config):
+    from .streamer import GCodeStreamer
+
     streamer = GCodeStreamer(config.serial)
     with streamer:
         status = streamer.query_status()
@@ -209,6 +320,8 @@ def cmd_status(args, config):
 
 
 def cmd_reset(args, config):
+    from .streamer import GCodeStreamer
+
     streamer = GCodeStreamer(config.serial)
     with streamer:
         streamer.soft_reset()
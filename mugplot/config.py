@@ -1,12 +1,11 @@
 """Configuration loading and dataclasses for mug plotter."""
 
+import functools
 from dataclasses import dataclass, field
 from pathlib import Path
 
-import yaml
 
-
-@dataclass
+@dataclass(frozen=True, slots=True)
 class MachineConfig:
     bed_width: float = 205.0
     bed_height: float = 73.0
@@ -19,21 +18,30 @@ class MachineConfig:
     draw_speed: float = 800.0
     travel_speed: float = 2000.0
     curve_tolerance: float = 0.1
+    tessellation: str = "levien"  # cubic flattening: "levien" or "afd"
+    parallel_threshold: int = 2000  # paths; flatten in worker processes from this many
     home_on_start: bool = True
     dock_y: float | None = None
     dock_z: float | None = None
 
+    def __post_init__(self):
+        if self.tessellation not in ("levien", "afd"):
+            raise ValueError(
+                f"tessellation must be 'levien' or 'afd', got {self.tessellation!r}"
+            )
+
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class SerialConfig:
     port: str = "/dev/ttyUSB0"
     baud_rate: int = 115200
     rx_buffer_size: int = 128
     timeout: float = 2.0
     connect_timeout: float = 10.0
+    compact: bool = False  # strip spaces between GCode words when streaming
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Config:
     machine: MachineConfig = field(default_factory=MachineConfig)
     serial: SerialConfig = field(default_factory=SerialConfig)
@@ -43,14 +51,20 @@ def load_config(path: Path | str | None = None) -> Config:
     """Load config from YAML file. Falls back to defaults if no file given."""
     if path is None:
         path = Path(__file__).parent.parent / "config.yaml"
-    else:
-        path = Path(path)
+    return _load_config(Path(path).resolve())
 
+
+@functools.lru_cache(maxsize=4)
+def _load_config(path: Path) -> Config:
     if not path.exists():
         return Config()
 
+    import yaml
+
+    # libyaml's C loader when PyYAML was built with it; same semantics as safe_load
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
     with open(path) as f:
-        raw = yaml.safe_load(f) or {}
+        raw = yaml.load(f, Loader=loader) or {}
 
     machine = MachineConfig(**raw.get("machine", {}))
     serial = SerialConfig(**raw.get("serial", {}))
@@ -5,8 +5,15 @@ track bytes in flight, only send when buffer space is available,
 dequeue on ok/error responses.
 """
 
+import array
+import itertools
+import mmap
+import os
+import re
+import selectors
+import struct
+import sys
 import time
-from collections import deque
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Callable, Protocol
@@ -16,12 +23,25 @@ import serial
 from .config import SerialConfig
 
 
-@dataclass
+@dataclass(slots=True)
 class StreamResult:
     lines_sent: int = 0
-    errors: list[str] = field(default_factory=list)
     elapsed: float = 0.0
     completed: bool = False
+    # (ack_count, raw response) per error/alarm; formatted on demand by .errors
+    _raw_errors: list[tuple[int, bytes]] = field(default_factory=list, repr=False)
+
+    @property
+    def errors(self) -> list[str]:
+        """Human-readable error and alarm messages, in the order received."""
+        out = []
+        for ack_count, raw in self._raw_errors:
+            resp = raw.decode("utf-8", errors="replace")
+            if resp.startswith("ALARM:"):
+                out.append(f"ALARM at line {ack_count}: {resp}")
+            else:
+                out.append(f"Line {ack_count}: {resp}")
+        return out
 
 
 class SerialPort(Protocol):
@@ -38,26 +58,104 @@ class SerialPort(Protocol):
 ProgressCallback = Callable[[int, int], None]  # (lines_sent, total_lines)
 
 
+# Linux TIOCGSERIAL/TIOCSSERIAL, see <linux/serial.h>
+_TIOCGSERIAL = 0x541E
+_TIOCSSERIAL = 0x541F
+_ASYNC_LOW_LATENCY = 0x2000
+_SERIAL_STRUCT_SIZE = 128  # >= sizeof(struct serial_struct) on any arch
+_SERIAL_FLAGS_OFFSET = 16  # after type, line, port, irq
+
+
+def _set_low_latency(port) -> bool:
+    """Set ASYNC_LOW_LATENCY on a Linux tty so USB adapters don't batch replies.
+
+    FTDI/CH340 drivers otherwise hold received bytes for up to 16 ms, which
+    delays every ok and starves the character-counting window. Returns True
+    if the flag was set; any failure is ignored (non-Linux, no ioctl support).
+    """
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        import fcntl
+
+        fd = port.fileno()
+        buf = bytearray(_SERIAL_STRUCT_SIZE)
+        fcntl.ioctl(fd, _TIOCGSERIAL, buf)
+        flags = struct.unpack_from("i", buf, _SERIAL_FLAGS_OFFSET)[0]
+        struct.pack_into("i", buf, _SERIAL_FLAGS_OFFSET, flags | _ASYNC_LOW_LATENCY)
+        fcntl.ioctl(fd, _TIOCSSERIAL, buf)
+    except (OSError, AttributeError, ValueError):
+        return False
+    return True
+
+
+def _open_selector(port) -> selectors.BaseSelector | None:
+    """Return a selector watching the port for input, or None if it has no fd.
+
+    pyserial exposes a pollable fd on POSIX only; on Windows (and for mock
+    ports) stream() falls back to blocking reads.
+    """
+    if sys.platform == "win32":
+        return None
+    try:
+        fd = port.fileno()
+    except (AttributeError, OSError, ValueError):
+        return None
+    sel = selectors.DefaultSelector()
+    sel.register(fd, selectors.EVENT_READ)
+    return sel
+
+
+# Parenthetical comment, or everything from ';' to end of line
+_STRIP_RE = re.compile(r"\([^)]*\)|;.*")
+
+
 def _strip_gcode(line: str) -> str:
     """Strip comments and whitespace from a GCode line."""
-    # Remove inline comments (everything after semicolon)
-    if ";" in line:
-        line = line[: line.index(";")]
-    # Remove parenthetical comments
-    while "(" in line and ")" in line:
-        start = line.index("(")
-        end = line.index(")", start)
-        line = line[:start] + line[end + 1 :]
-    return line.strip()
+    if "(" not in line:
+        # Common case: at most a ';' comment, no regex needed
+        return line.partition(";")[0].strip()
+    return _STRIP_RE.sub("", line).strip()
+
+
+def _compact_gcode(line: str) -> str:
+    """Drop the spaces between GCode words ("G1 X5 Y10" -> "G1X5Y10").
+
+    Grbl and FluidNC ignore whitespace in GCode blocks, so this only
+    shortens the bytes on the wire. '$' system commands are left alone
+    since their arguments may contain meaningful spaces.
+    """
+    if line.startswith("$"):
+        return line
+    return line.replace(" ", "")
 
 
 def load_gcode(path: str | Path) -> list[str]:
-    """Load GCode from file, stripping comments and blank lines."""
+    """Load GCode from file, stripping comments and blank lines.
+
+    The file is memory-mapped and decoded one line at a time, so the raw
+    text is never held in memory alongside the cleaned lines.
+
+    Raises:
+        ValueError: If a line has non-ASCII characters outside comments;
+            the controller only accepts ASCII GCode.
+    """
     lines = []
-    for raw in Path(path).read_text().splitlines():
-        cleaned = _strip_gcode(raw)
-        if cleaned:
-            lines.append(cleaned)
+    lineno = 0
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return lines
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for chunk in iter(mm.readline, b""):
+                # mmap splits on \n only; CR-only line endings are lines too
+                for raw in chunk.decode("utf-8", errors="replace").splitlines():
+                    lineno += 1
+                    cleaned = _strip_gcode(raw)
+                    if not cleaned:
+                        continue
+                    if not cleaned.isascii():
+                        raise ValueError(f"{path}: line {lineno}: non-ASCII GCode {cleaned!r}")
+                    lines.append(cleaned)
     return lines
 
 
@@ -83,6 +181,7 @@ class GCodeStreamer:
             timeout=self.cfg.timeout,
         )
         self._owns_port = True
+        _set_low_latency(self._port)
 
         # Drain startup banner or any leftover bytes from a previous session
         banner_lines = []
@@ -94,11 +193,14 @@ class GCodeStreamer:
                 if line.startswith("Grbl") or "ready" in line.lower():
                     break
 
-        # Flush any remaining bytes (leftover responses from previous streams)
-        time.sleep(0.1)
-        while self._port.in_waiting:
-            self._port.read(self._port.in_waiting)
-            time.sleep(0.05)
+        # Flush any remaining bytes (leftover responses from previous streams).
+        # Stop as soon as the port is quiet instead of sleeping unconditionally.
+        deadline = time.monotonic() + 0.15
+        while time.monotonic() < deadline:
+            n = self._port.in_waiting
+            if not n:
+                break
+            self._port.read(n)
 
         return "\n".join(banner_lines)
 
@@ -188,7 +290,6 @@ class GCodeStreamer:
 
         Returns (x, y, z) or None on failure.
         """
-        import re
         status = self.query_status()
         m = re.search(r"MPos:([-\d.]+),([-\d.]+),([-\d.]+)", status)
         if m:
@@ -214,63 +315,103 @@ class GCodeStreamer:
 
         result = StreamResult()
         total = len(gcode_lines)
+        if self.cfg.compact:
+            gcode_lines = [_compact_gcode(line) for line in gcode_lines]
+        # GCode is ASCII: encode the whole job once into one buffer, so each
+        # refill of the RX window is a single slice of it. offsets[i] is where
+        # line i starts; offsets[total] is the end of the payload. Any stray
+        # non-ASCII character becomes one '?' byte, so lengths still match.
+        payload = "".join(line + "\n" for line in gcode_lines).encode(
+            "ascii", errors="replace"
+        )
+        lengths = [len(line) + 1 for line in gcode_lines]
+        offsets = list(itertools.accumulate(lengths, initial=0))
         start_time = time.monotonic()
 
         bytes_in_flight = 0
-        sent_lengths: deque[int] = deque()
         send_idx = 0
         ack_count = 0
 
         buf_size = self.cfg.rx_buffer_size
-
-        while ack_count < total:
-            # Send lines while buffer has space
-            while send_idx < total:
-                line = gcode_lines[send_idx]
-                line_bytes = len(line) + 1  # +1 for \n
-                if bytes_in_flight + line_bytes >= buf_size:
-                    break
-                self._port.write((line + "\n").encode("utf-8"))
-                bytes_in_flight += line_bytes
-                sent_lengths.append(line_bytes)
-                send_idx += 1
-
-            # Read response
-            resp = self._port.readline().decode("utf-8", errors="replace").strip()
-
-            if not resp:
-                # Timeout — check if we've sent everything
-                if send_idx >= total and ack_count >= send_idx:
-                    break
-                continue
-
-            if resp == "ok":
-                if sent_lengths:
-                    bytes_in_flight -= sent_lengths.popleft()
-                ack_count += 1
-                result.lines_sent = ack_count
-                if progress:
-                    progress(ack_count, total)
-
-            elif resp.startswith("error:"):
-                if sent_lengths:
-                    bytes_in_flight -= sent_lengths.popleft()
-                ack_count += 1
-                result.errors.append(f"Line {ack_count}: {resp}")
-                result.lines_sent = ack_count
-                if progress:
-                    progress(ack_count, total)
-
-            elif resp.startswith("ALARM:"):
-                result.errors.append(f"ALARM at line {ack_count}: {resp}")
-                break
-
-            # Ignore status reports and other messages during streaming
+        timeout = self.cfg.timeout
+
+        # Ring of in-flight line lengths. Every line is at least 2 bytes, so
+        # at most buf_size // 2 are ever outstanding; size it to a power of two.
+        ring_size = 1 << max(buf_size, 2).bit_length()
+        ring_mask = ring_size - 1
+        sent_lengths = array.array("i", [0]) * ring_size
+        head = tail = 0
+        # Bytes read but not yet split into response lines. Local to this call:
+        # anything left over (e.g. after an ALARM) must not count as an ack later.
+        rx_buf = bytearray()
+        alarm = False
+
+        selector = _open_selector(self._port)
+        try:
+            while ack_count < total and not alarm:
+                # SEND: every line that fits in the remaining buffer space, as one write
+                if send_idx < total and bytes_in_flight + lengths[send_idx] < buf_size:
+                    batch_start = send_idx
+                    while send_idx < total:
+                        line_bytes = lengths[send_idx]
+                        if bytes_in_flight + line_bytes >= buf_size:
+                            break
+                        bytes_in_flight += line_bytes
+                        sent_lengths[tail & ring_mask] = line_bytes
+                        tail += 1
+                        send_idx += 1
+                    self._port.write(payload[offsets[batch_start] : offsets[send_idx]])
+
+                # WAIT_ACK: the window is full or everything is sent, so nothing
+                # can happen until a complete reply line is buffered. Wait on the
+                # fd when we can, so a reply is picked up the moment it lands;
+                # otherwise block in read() for up to one timeout.
+                deadline = time.monotonic() + timeout
+                while b"\n" not in rx_buf:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    if selector is not None and not selector.select(remaining):
+                        break
+                    rx_buf += self._port.read(self._port.in_waiting or 1)
+
+                # Dispatch every complete response line in the buffer
+                while (idx := rx_buf.find(b"\n")) != -1:
+                    raw = bytes(rx_buf[:idx]).strip()
+                    del rx_buf[: idx + 1]
+
+                    # Compare raw bytes; only errors are ever decoded (by StreamResult)
+                    if raw == b"ok":
+                        if head != tail:
+                            bytes_in_flight -= sent_lengths[head & ring_mask]
+                            head += 1
+                        ack_count += 1
+                        result.lines_sent = ack_count
+                        if progress:
+                            progress(ack_count, total)
+
+                    elif raw[:6] == b"error:":
+                        if head != tail:
+                            bytes_in_flight -= sent_lengths[head & ring_mask]
+                            head += 1
+                        ack_count += 1
+                        result._raw_errors.append((ack_count, raw))
+                        result.lines_sent = ack_count
+                        if progress:
+                            progress(ack_count, total)
+
+                    elif raw[:6] == b"ALARM:":
+                        result._raw_errors.append((ack_count, raw))
+                        alarm = True
+                        break
+
+                    # Ignore status reports and other messages during streaming
+        finally:
+            if selector is not None:
+                selector.close()
 
         result.elapsed = time.monotonic() - start_time
-        result.completed = ack_count >= total and not any(
-            e.startswith("ALARM") for e in result.errors
-        )
+        result.completed = ack_count >= total and not alarm
         return result
 
     def __enter__(self):
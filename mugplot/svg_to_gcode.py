@@ -4,9 +4,17 @@ Parses SVG paths using svgpathtools, maps coordinates to machine space,
 linearizes curves via adaptive subdivision, and generates GCode.
 """
 
+import functools
+import itertools
+import math
+import multiprocessing
+import os
 import re
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import numpy as np
 from svgpathtools import svg2paths2, Line, CubicBezier, QuadraticBezier, Arc
 
 from .config import MachineConfig
@@ -17,51 +25,448 @@ def _point_to_xy(point: complex) -> tuple[float, float]:
     return (point.real, point.imag)
 
 
-def _linearize_segment(segment, tolerance: float) -> list[tuple[float, float]]:
+def _linearize_segment(
+    segment,
+    tolerance: float,
+    method: str = "levien",
+    out: list[tuple[float, float]] | None = None,
+) -> list[tuple[float, float]]:
     """Adaptively linearize a path segment into (x, y) points.
 
     For Line segments, returns just the endpoint.
-    For curves, recursively bisects until chord deviation < tolerance.
+    Bezier curves are flattened analytically (Levien), or cubics by
+    adaptive forward differencing when method is "afd"; elliptical arcs
+    are stepped at a fixed angle; other curves recursively bisect until
+    chord deviation < tolerance.
     Returns points excluding the segment start (caller handles continuity).
+    Points are appended to out when given, which is also returned.
     """
+    if out is None:
+        out = []
+
     if isinstance(segment, Line):
-        return [_point_to_xy(segment.end)]
+        out.append(_point_to_xy(segment.end))
+    elif isinstance(segment, (QuadraticBezier, CubicBezier)):
+        c = _extract_ctrl(segment)
+        if _ctrl_near_chord(c, tolerance):
+            out.append((c[-2], c[-1]))
+        elif len(c) == 6:
+            _flatten_quad(*c, tolerance, out)
+        elif method == "afd":
+            _afd_cubic(c, tolerance, out)
+        else:
+            _flatten_cubic(c, tolerance, out)
+    elif isinstance(segment, Arc):
+        _flatten_arc(segment, tolerance, out)
+    else:
+        # Adaptive subdivision for any other curve type
+        _subdivide(segment, 0.0, 1.0, tolerance, out)
+    return out
+
+
+def _extract_ctrl(segment) -> tuple[float, ...]:
+    """Control points of a Bezier segment as flat floats (x0, y0, x1, y1, ...).
+
+    Pulling these out once means the flattening math never touches
+    svgpathtools' complex-number point evaluation.
+    """
+    return tuple(c for p in segment.bpoints() for c in (p.real, p.imag))
+
 
-    # Adaptive subdivision for curves
-    return _subdivide(segment, 0.0, 1.0, tolerance)
+def _ctrl_near_chord(c: tuple[float, ...], tolerance: float) -> bool:
+    """True if every inner control point is within tolerance of the chord.
+
+    A Bezier lies inside its control polygon's convex hull, so the chord
+    alone is then a close enough approximation. Distance is to the chord
+    segment, not its line, so curves that double back are not collapsed.
+    """
+    x0, y0, xn, yn = c[0], c[1], c[-2], c[-1]
+    for i in range(2, len(c) - 2, 2):
+        if _point_segment_dist(c[i], c[i + 1], x0, y0, xn, yn) > tolerance:
+            return False
+    return True
+
+
+def _cubic_coeffs(c: tuple[float, ...]) -> tuple[float, ...]:
+    """Power-basis coefficients (ax, bx, cx, dx, ay, by, cy, dy) of a cubic Bezier.
+
+    B(t) = ((a*t + b)*t + c)*t + d per axis.
+    """
+    x0, y0, x1, y1, x2, y2, x3, y3 = c
+    return (
+        x3 - x0 + 3.0 * (x1 - x2), 3.0 * (x0 - 2.0 * x1 + x2), 3.0 * (x1 - x0), x0,
+        y3 - y0 + 3.0 * (y1 - y2), 3.0 * (y0 - 2.0 * y1 + y2), 3.0 * (y1 - y0), y0,
+    )
+
+
+def _eval_cubic(t: float, k: tuple[float, ...]) -> tuple[float, float]:
+    """Point on a cubic at t, by Horner's rule on _cubic_coeffs output."""
+    ax, bx, cx, dx, ay, by, cy, dy = k
+    return ((ax * t + bx) * t + cx) * t + dx, ((ay * t + by) * t + cy) * t + dy
+
+
+def _eval_cubic_deriv(t: float, k: tuple[float, ...]) -> tuple[float, float]:
+    """First derivative of a cubic at t, from _cubic_coeffs output."""
+    ax, bx, cx, _, ay, by, cy, _ = k
+    return (3.0 * ax * t + 2.0 * bx) * t + cx, (3.0 * ay * t + 2.0 * by) * t + cy
+
+
+# Curve flattening after Raph Levien, "Flattening quadratic Béziers" (2019):
+# map the quadratic onto the parabola y = x², where the number of segments
+# needed for a given error is an integral with a good closed-form
+# approximation, then place points at equal steps of that integral.
+
+
+def _approx_parabola_integral(x: float) -> float:
+    d = 0.67
+    return x / (1.0 - d + (d**4 + 0.25 * x * x) ** 0.25)
+
+
+def _approx_parabola_inv_integral(x: float) -> float:
+    b = 0.39
+    return x * (1.0 - b + (b * b + 0.25 * x * x) ** 0.5)
+
+
+def _flatten_quad(
+    x0: float,
+    y0: float,
+    x1: float,
+    y1: float,
+    x2: float,
+    y2: float,
+    tolerance: float,
+    out: list[tuple[float, float]],
+) -> None:
+    """Flatten a quadratic Bezier, appending its points (excluding the start) to out."""
+    ddx = 2.0 * x1 - x0 - x2
+    ddy = 2.0 * y1 - y0 - y2
+    dd = math.hypot(ddx, ddy)
+    if dd <= 4.0 * tolerance:
+        # B(t) - chord(t) = t(1 - t) * dd, at most dd / 4: the chord is close
+        # enough. This also keeps u2 - u0 below from cancelling to zero.
+        out.append((x2, y2))
+        return
+    cross = (x2 - x0) * ddy - (y2 - y0) * ddx
+
+    if abs(cross) <= 1e-9 * dd * math.hypot(x2 - x0, y2 - y0):
+        # Control point on the chord line: the curve is straight, but it may
+        # overshoot an endpoint and double back at the derivative's zero.
+        t = ((x1 - x0) * ddx + (y1 - y0) * ddy) / (dd * dd)
+        if 0.0 < t < 1.0:
+            mt = 1.0 - t
+            out.append(
+                (
+                    mt * mt * x0 + 2.0 * mt * t * x1 + t * t * x2,
+                    mt * mt * y0 + 2.0 * mt * t * y1 + t * t * y2,
+                )
+            )
+        out.append((x2, y2))
+        return
+
+    # Parameters of the equivalent segment of y = x²
+    u0 = ((x1 - x0) * ddx + (y1 - y0) * ddy) / cross
+    u2 = ((x2 - x1) * ddx + (y2 - y1) * ddy) / cross
+    scale = abs(cross) / (dd * abs(u2 - u0))
+
+    a0 = _approx_parabola_integral(u0)
+    a2 = _approx_parabola_integral(u2)
+    sqrt_tol = math.sqrt(tolerance)
+    if (u0 < 0.0) == (u2 < 0.0):
+        val = abs(a2 - a0) * math.sqrt(scale)
+    else:
+        # Segment spans the vertex (curvature maximum)
+        xmin = sqrt_tol / math.sqrt(scale)
+        val = sqrt_tol * abs(a2 - a0) / _approx_parabola_integral(xmin)
+    n = max(1, math.ceil(0.5 * val / sqrt_tol))
+
+    v0 = _approx_parabola_inv_integral(a0)
+    v2 = _approx_parabola_inv_integral(a2)
+    for i in range(1, n):
+        u = _approx_parabola_inv_integral(a0 + (a2 - a0) * i / n)
+        t = (u - v0) / (v2 - v0)
+        mt = 1.0 - t
+        out.append(
+            (
+                mt * mt * x0 + 2.0 * mt * t * x1 + t * t * x2,
+                mt * mt * y0 + 2.0 * mt * t * y1 + t * t * y2,
+            )
+        )
+    out.append((x2, y2))
+
+
+def _flatten_cubic(
+    c: tuple[float, ...], tolerance: float, out: list[tuple[float, float]]
+) -> None:
+    """Flatten a cubic Bezier, given as _extract_ctrl output, appending its points to out.
+
+    The cubic is split at uniform t into quadratics, using 10% of the
+    tolerance budget, and each quadratic is flattened with the rest.
+    The cubic-to-quadratic error depends only on the (constant) third
+    derivative, so the number of pieces has a closed form.
+    """
+    x0, y0, x1, y1, x2, y2, x3, y3 = c
+    quad_tol = 0.1 * tolerance
+    flat_tol = tolerance - quad_tol
+    ex = 3.0 * (x2 - x1) - x3 + x0
+    ey = 3.0 * (y2 - y1) - y3 + y0
+    err = ex * ex + ey * ey
+    n = max(1, math.ceil((err / (432.0 * quad_tol * quad_tol)) ** (1.0 / 6.0)))
+
+    k = _cubic_coeffs(c)
+    h = 0.25 / n
+    ax, ay = x0, y0
+    adx, ady = k[2], k[6]  # B'(0)
+    for i in range(1, n + 1):
+        t = i / n
+        bx, by = (x3, y3) if i == n else _eval_cubic(t, k)
+        bdx, bdy = _eval_cubic_deriv(t, k)
+        # Best quadratic for the sub-cubic over [t - 1/n, t]
+        qx = 0.5 * (ax + bx) + h * (adx - bdx)
+        qy = 0.5 * (ay + by) + h * (ady - bdy)
+        _flatten_quad(ax, ay, qx, qy, bx, by, flat_tol, out)
+        ax, ay, adx, ady = bx, by, bdx, bdy
+
+
+def _flatten_arc(segment: Arc, tolerance: float, out: list[tuple[float, float]]) -> None:
+    """Flatten an elliptical arc at a fixed angular step, appending points to out.
+
+    A chord spanning dθ of a circle of radius r deviates from it by
+    r·(1 - cos(dθ/2)). The ellipse is a linear image of the unit circle
+    stretched by at most max(rx, ry), so that radius bounds the error and
+    dθ = 2·acos(1 - tol/r). Points use the same parametrization as
+    svgpathtools' Arc.point.
+    """
+    rx = segment.radius.real
+    ry = segment.radius.imag
+    r = max(rx, ry)
+    dtheta = 2.0 * math.acos(max(-1.0, 1.0 - tolerance / r))
+    theta = math.radians(segment.theta)
+    delta = math.radians(segment.delta)
+    n = max(1, math.ceil(abs(delta) / dtheta))
+
+    cosphi = segment.rot_matrix.real
+    sinphi = segment.rot_matrix.imag
+    cx = segment.center.real
+    cy = segment.center.imag
+    for k in range(1, n):
+        angle = theta + delta * k / n
+        ca = rx * math.cos(angle)
+        sa = ry * math.sin(angle)
+        out.append((ca * cosphi - sa * sinphi + cx, ca * sinphi + sa * cosphi + cy))
+    out.append(_point_to_xy(segment.end))
+
+
+_AFD_MIN_STEP = 1.0 / 65536
+
+
+def _afd_cubic(
+    c: tuple[float, ...], tolerance: float, out: list[tuple[float, float]]
+) -> None:
+    """Flatten a cubic Bezier by adaptive forward differencing (Lien, Shantz, Pratt).
+
+    Walks t in power-of-two steps, advancing the point with additions
+    only. For a cubic the second difference ddf is exactly h²·B''(t + h),
+    and ddf - dddf is h²·B''(t); since B'' is linear, the larger of the
+    two bounds the chord error of the next step by 1/8 of it. The step
+    is halved while that bound exceeds tolerance and doubled when the
+    doubled step would still pass, keeping t on the 2h grid.
+    """
+    ax, bx, cx, x, ay, by, cy, y = _cubic_coeffs(c)
+    limit = 8.0 * tolerance
+    # Forward differences for step h = 1 at t = 0
+    dfx, ddfx, dddfx = ax + bx + cx, 6.0 * ax + 2.0 * bx, 6.0 * ax
+    dfy, ddfy, dddfy = ay + by + cy, 6.0 * ay + 2.0 * by, 6.0 * ay
+    h = 1.0
+    t = 0.0
+    while t < 1.0:
+        # Coarsen: double the step while the doubled step is still flat
+        while h < 1.0 and t % (2.0 * h) == 0.0:
+            ddx2 = 4.0 * (ddfx + dddfx)
+            ddy2 = 4.0 * (ddfy + dddfy)
+            d3x2, d3y2 = 8.0 * dddfx, 8.0 * dddfy
+            if max(math.hypot(ddx2, ddy2), math.hypot(ddx2 - d3x2, ddy2 - d3y2)) > limit:
+                break
+            dfx, dfy = 2.0 * dfx + ddfx, 2.0 * dfy + ddfy
+            ddfx, ddfy, dddfx, dddfy = ddx2, ddy2, d3x2, d3y2
+            h *= 2.0
+
+        # Refine: halve the step until it is flat enough
+        while h > _AFD_MIN_STEP and max(
+            math.hypot(ddfx, ddfy), math.hypot(ddfx - dddfx, ddfy - dddfy)
+        ) > limit:
+            dddfx *= 0.125
+            dddfy *= 0.125
+            ddfx = 0.25 * ddfx - dddfx
+            ddfy = 0.25 * ddfy - dddfy
+            dfx = 0.5 * (dfx - ddfx)
+            dfy = 0.5 * (dfy - ddfy)
+            h *= 0.5
+
+        x += dfx
+        y += dfy
+        dfx += ddfx
+        dfy += ddfy
+        ddfx += dddfx
+        ddfy += dddfy
+        t += h
+        out.append((x, y))
+
+    # Snap the accumulated endpoint to the exact one
+    out[-1] = (c[6], c[7])
 
 
 def _subdivide(
-    segment, t_start: float, t_end: float, tolerance: float
-) -> list[tuple[float, float]]:
-    """Recursively subdivide a curve segment until it's flat enough."""
-    start = segment.point(t_start)
-    end = segment.point(t_end)
-    t_mid = (t_start + t_end) / 2.0
-    mid_actual = segment.point(t_mid)
+    segment, t_start: float, t_end: float, tolerance: float, out: list[tuple[float, float]]
+) -> None:
+    """Bisect a curve segment until each piece is flat enough, appending points to out.
 
-    # Chord midpoint vs actual curve midpoint
-    mid_chord = (start + end) / 2.0
-    deviation = abs(mid_actual - mid_chord)
+    Uses an explicit work stack instead of recursion; the left half is
+    pushed last so pieces come off the stack, and points are emitted,
+    in order of t.
+    """
+    point = segment.point
+    stack = [(t_start, t_end, point(t_start), point(t_end))]
+    while stack:
+        t0, t1, start, end = stack.pop()
+        t_mid = (t0 + t1) * 0.5
+        mid_actual = point(t_mid)
+
+        # Chord midpoint vs actual curve midpoint
+        deviation = abs(mid_actual - (start + end) * 0.5)
+
+        if deviation <= tolerance or (t1 - t0) < 1e-6:
+            out.append((end.real, end.imag))
+        else:
+            stack.append((t_mid, t1, mid_actual, end))
+            stack.append((t0, t_mid, start, mid_actual))
 
-    if deviation <= tolerance or (t_end - t_start) < 1e-6:
-        return [_point_to_xy(end)]
 
-    left = _subdivide(segment, t_start, t_mid, tolerance)
-    right = _subdivide(segment, t_mid, t_end, tolerance)
-    return left + right
+def _flatten_path(path, tolerance: float, method: str = "levien") -> np.ndarray:
+    """Flatten every segment of a path into one (N, 2) array of SVG coordinates.
 
+    This is the whole per-path geometry stage, kept free of machine config
+    and GCode so it can be swapped for a compiled kernel without touching
+    the emitter.
+    """
+    pts = [_point_to_xy(path[0].start)]
+    for segment in path:
+        _linearize_segment(segment, tolerance, method, pts)
+    return np.array(pts, dtype=np.float64)
+
+
+@functools.cache
+def _pool_context() -> multiprocessing.context.BaseContext:
+    """Start method for flattening workers.
+
+    Never plain fork: the caller may have threads running (or an open serial
+    port), and a forked child would inherit them. The forkserver preloads
+    this module once so each worker starts without re-importing NumPy and
+    svgpathtools; spawn is the fallback where forkserver does not exist.
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    ctx = multiprocessing.get_context("forkserver")
+    ctx.set_forkserver_preload([__name__])
+    return ctx
 
-def _map_coord(
-    x: float, y: float, cfg: MachineConfig, svg_height: float
-) -> tuple[float, float]:
-    """Map SVG coordinates to machine coordinates."""
-    mx = x + cfg.origin_x
+
+def _flatten_paths_parallel(paths: list, tolerance: float, method: str) -> list[np.ndarray]:
+    """_flatten_path over many paths in worker processes, results in path order.
+
+    The flattening is pure Python and holds the GIL, so threads would not help.
+    """
+    chunksize = max(1, len(paths) // (4 * (os.cpu_count() or 1)))
+    with ProcessPoolExecutor(mp_context=_pool_context()) as pool:
+        return list(
+            pool.map(
+                _flatten_path,
+                paths,
+                itertools.repeat(tolerance),
+                itertools.repeat(method),
+                chunksize=chunksize,
+            )
+        )
+
+
+def _map_points(pts: np.ndarray, cfg: MachineConfig, svg_height: float) -> np.ndarray:
+    """Map an (N, 2) array of SVG coordinates to machine coordinates."""
+    out = pts + (cfg.origin_x, cfg.origin_y)
     if cfg.flip_y:
-        my = (svg_height - y) + cfg.origin_y
-    else:
-        my = y + cfg.origin_y
-    return (mx, my)
+        out[:, 1] = (svg_height - pts[:, 1]) + cfg.origin_y
+    return out
+
+
+def _point_segment_dist(
+    px: float, py: float, ax: float, ay: float, bx: float, by: float
+) -> float:
+    """Distance from point P to segment AB (not the infinite line, so reversals count)."""
+    dx = bx - ax
+    dy = by - ay
+    seg_len2 = dx * dx + dy * dy
+    if seg_len2 == 0.0:
+        return math.hypot(px - ax, py - ay)
+    t = ((px - ax) * dx + (py - ay) * dy) / seg_len2
+    t = min(1.0, max(0.0, t))
+    return math.hypot(px - ax - t * dx, py - ay - t * dy)
+
+
+def _simplify_colinear(pts: np.ndarray, tolerance: float) -> np.ndarray:
+    """Drop points that lie within tolerance of a straight run through them.
+
+    Greedy forward scan: the run from the last kept point is extended to
+    each next point as long as every point skipped so far stays within
+    tolerance of the new chord. Each skipped point at distance d narrows
+    the band of chord directions, seen from the kept point, to within
+    asin(tolerance / d) of its own direction, so a candidate is tested
+    against the band alone: O(1) per point. A candidate must also reach
+    at least as far as every skipped point, so none of them projects
+    past the chord's end (reversals are kept). The first and last points
+    are always kept.
+    """
+    n = len(pts)
+    if n < 3:
+        return pts
+    coords = pts.tolist()
+    keep = [0]
+    ax, ay = coords[0]
+    ref = None  # direction of the first skipped point beyond tolerance
+    lo = hi = 0.0  # band of chord directions, relative to ref
+    reach = 0.0  # farthest skipped point
+    for k in range(1, n):
+        px, py = coords[k]
+        dx = px - ax
+        dy = py - ay
+        d = math.hypot(dx, dy)
+        if ref is not None:
+            theta = math.atan2(dy, dx) - ref
+            if theta > math.pi:
+                theta -= 2.0 * math.pi
+            elif theta < -math.pi:
+                theta += 2.0 * math.pi
+        if d < reach or (ref is not None and not lo <= theta <= hi):
+            # Chord to this point would miss a skipped one: keep the previous
+            # point and start a new run from it
+            ax, ay = coords[k - 1]
+            keep.append(k - 1)
+            dx = px - ax
+            dy = py - ay
+            d = math.hypot(dx, dy)
+            ref = None
+            reach = 0.0
+
+        # This point is skipped from now on, unless the run ends here
+        reach = max(reach, d)
+        if d > tolerance:
+            half = math.asin(tolerance / d)
+            if ref is None:
+                ref = math.atan2(dy, dx)
+                lo, hi = -half, half
+            else:
+                # theta is still this point's direction from the run test above
+                lo = max(lo, theta - half)
+                hi = min(hi, theta + half)
+    keep.append(n - 1)
+    return pts[keep]
 
 
 def _fmt(v: float) -> str:
@@ -69,20 +474,133 @@ def _fmt(v: float) -> str:
     return f"{v:.3f}".rstrip("0").rstrip(".")
 
 
-def svg_to_gcode(svg_path: str | Path, cfg: MachineConfig | None = None) -> list[str]:
+# Decimal suffix for each micron remainder: "", ".001", ..., ".01", ..., ".999"
+_FRAC_STR = [""] + [f".{r:03d}".rstrip("0") for r in range(1, 1000)]
+
+
+def _fmt_array(values: np.ndarray) -> list[str]:
+    """Format an array of floats like _fmt, via integer microns.
+
+    Values are rounded to whole microns once in NumPy and split into
+    whole millimetres and a remainder, so each string is an int-to-str
+    plus a table lookup rather than a float format.
+    """
+    microns = np.rint(values * 1000.0).astype(np.int64)
+    whole, frac = np.divmod(np.abs(microns), 1000)
+    sign = np.where(microns < 0, "-", "")
+    return [
+        s + str(w) + _FRAC_STR[f]
+        for s, w, f in zip(sign.tolist(), whole.tolist(), frac.tolist())
+    ]
+
+
+@functools.lru_cache(maxsize=8)
+def _move_words(cfg: MachineConfig) -> tuple[str, str, str, str, str]:
+    """Formatted (z_up, z_down, z_feed, draw_feed, travel_feed) for a config.
+
+    Configs are frozen and hashable, so this is computed once per config.
+    """
+    return (
+        _fmt(cfg.z_pen_up),
+        _fmt(cfg.z_pen_down),
+        _fmt(cfg.z_travel_speed),
+        _fmt(cfg.draw_speed),
+        _fmt(cfg.travel_speed),
+    )
+
+
+class _ModalState:
+    """Last X/Y/Z and feed sent to the controller, for dropping redundant words.
+
+    Grbl/FluidNC keep a single modal F shared by G0 and G1, so one feed
+    register is tracked for both.
+    """
+
+    __slots__ = ("x", "y", "z", "feed")
+
+    def __init__(self):
+        self.x = self.y = self.z = self.feed = None
+
+    def move(
+        self,
+        cmd: str,
+        x: str | None = None,
+        y: str | None = None,
+        z: str | None = None,
+        f: str | None = None,
+        comment: str = "",
+    ) -> str:
+        """Build a move with only the axes that change, or "" if nothing moves."""
+        words = [cmd]
+        if x is not None and x != self.x:
+            words.append("X" + x)
+            self.x = x
+        if y is not None and y != self.y:
+            words.append("Y" + y)
+            self.y = y
+        if z is not None and z != self.z:
+            words.append("Z" + z)
+            self.z = z
+        if len(words) == 1:
+            return ""
+        if f is not None and f != self.feed:
+            words.append("F" + f)
+            self.feed = f
+        line = " ".join(words)
+        return f"{line} ; {comment}" if comment else line
+
+
+@functools.lru_cache(maxsize=32)
+def _cached_svg2paths2(path_str: str, mtime_ns: int, size: int):
+    """svg2paths2, memoized on the file's identity so edits invalidate it.
+
+    The result is shared between calls and must not be mutated.
+    """
+    return svg2paths2(path_str)
+
+
+def svg_to_gcode(
+    svg_path: str | Path, cfg: MachineConfig | None = None, check_bounds: bool = False
+) -> list[str] | tuple[list[str], list[str]]:
     """Convert an SVG file to a list of GCode lines.
 
     Args:
         svg_path: Path to the SVG file.
         cfg: Machine configuration. Uses defaults if None.
+        check_bounds: Also validate the output as check_gcode_bounds would,
+            while generating it.
 
     Returns:
-        List of GCode strings (without newlines).
+        List of GCode strings (without newlines), or (lines, violations)
+        if check_bounds is set.
+    """
+    if not check_bounds:
+        return list(_iter_svg_to_gcode(svg_path, cfg))
+    violations: list[str] = []
+    lines = list(_iter_svg_to_gcode(svg_path, cfg, violations))
+    return lines, violations
+
+
+def _iter_svg_to_gcode(
+    svg_path: str | Path,
+    cfg: MachineConfig | None = None,
+    violations: list[str] | None = None,
+) -> Iterator[str]:
+    """Generate the GCode lines for an SVG file one at a time (see svg_to_gcode).
+
+    If violations is a list, out-of-bounds messages are appended to it.
+    Paths whose points are all inside the envelope (checked in NumPy) are
+    not re-parsed; everything else goes through check_gcode_bounds'
+    line check, so the messages and line numbers are the same.
     """
     if cfg is None:
         cfg = MachineConfig()
 
-    paths, attributes, svg_attributes = svg2paths2(str(svg_path))
+    svg_path = Path(svg_path).resolve()
+    st = os.stat(svg_path)
+    paths, attributes, svg_attributes = _cached_svg2paths2(
+        str(svg_path), st.st_mtime_ns, st.st_size
+    )
 
     # Determine SVG dimensions for Y-flip
     svg_height = cfg.bed_height  # default
@@ -98,108 +616,167 @@ def svg_to_gcode(svg_path: str | Path, cfg: MachineConfig | None = None) -> list
         except ValueError:
             pass
 
-    lines: list[str] = []
+    check = violations is not None
+    if check:
+        x_min, x_max, y_min, y_max, _, _ = _envelope(cfg)
+    lineno = 0  # lines emitted so far
 
     # Header
-    lines.append("G21 ; mm mode")
-    lines.append("G90 ; absolute positioning")
+    header = ["G21 ; mm mode", "G90 ; absolute positioning"]
     if cfg.home_on_start:
-        lines.append("$H ; home X and Y")
-    lines.append("G10 L2 P1 X0 Y0 Z0 ; clear G54 work offset")
-    lines.append("G92 Z0 ; set current Z as zero (Z must be manually at home)")
-    lines.append(f"G0 Z{_fmt(cfg.z_pen_up)} F{_fmt(cfg.z_travel_speed)} ; pen up")
-
-    current_feed = None
-
-    for path in paths:
-        if len(path) == 0:
-            continue
-
-        # Linearize all segments in this path
-        points: list[tuple[float, float]] = []
-        first_seg = path[0]
-        start_x, start_y = _point_to_xy(first_seg.start)
-        points.append(_map_coord(start_x, start_y, cfg, svg_height))
-
-        for segment in path:
-            raw_pts = _linearize_segment(segment, cfg.curve_tolerance)
-            for rx, ry in raw_pts:
-                points.append(_map_coord(rx, ry, cfg, svg_height))
+        header.append("$H ; home X and Y")
+    header.append("G10 L2 P1 X0 Y0 Z0 ; clear G54 work offset")
+    header.append("G92 Z0 ; set current Z as zero (Z must be manually at home)")
+    # Every move goes through the modal state so unchanged axes and feeds are
+    # dropped. Values are compared as formatted, i.e. as the controller sees them.
+    state = _ModalState()
+    z_up, z_down, z_feed, draw_feed, travel_feed = _move_words(cfg)
+
+    header.append(state.move("G0", z=z_up, f=z_feed, comment="pen up"))
+    if check:
+        violations.extend(check_gcode_bounds(header, cfg))
+    lineno += len(header)
+    yield from header
+
+    # Flattening and simplification each get half of curve_tolerance: their
+    # errors add, and the output must stay within it of the true curve.
+    # Flattening is independent per path; emission stays serial below so
+    # the modal state carries across paths as before
+    half_tol = cfg.curve_tolerance * 0.5
+    paths = [path for path in paths if len(path)]
+    if len(paths) >= cfg.parallel_threshold and (os.cpu_count() or 1) > 1:
+        flat_paths = _flatten_paths_parallel(paths, half_tol, cfg.tessellation)
+    else:
+        flat_paths = (_flatten_path(path, half_tol, cfg.tessellation) for path in paths)
 
-        if len(points) < 2:
+    for raw_pts in flat_paths:
+        if len(raw_pts) < 2:
             continue
-
-        # Pen up + rapid to path start
-        lines.append(f"G0 Z{_fmt(cfg.z_pen_up)}")
-        sx, sy = points[0]
-        if current_feed != cfg.travel_speed:
-            lines.append(f"G0 X{_fmt(sx)} Y{_fmt(sy)} F{_fmt(cfg.travel_speed)}")
-            current_feed = cfg.travel_speed
-        else:
-            lines.append(f"G0 X{_fmt(sx)} Y{_fmt(sy)}")
-
-        # Pen down
-        lines.append(f"G1 Z{_fmt(cfg.z_pen_down)} F{_fmt(cfg.z_travel_speed)}")
-        current_feed = cfg.z_travel_speed
-
-        # Draw moves
-        for px, py in points[1:]:
-            if current_feed != cfg.draw_speed:
-                lines.append(f"G1 X{_fmt(px)} Y{_fmt(py)} F{_fmt(cfg.draw_speed)}")
-                current_feed = cfg.draw_speed
-            else:
-                lines.append(f"G1 X{_fmt(px)} Y{_fmt(py)}")
+        points = _map_points(raw_pts, cfg, svg_height)
+        points = _simplify_colinear(points, half_tol)
+        xs = _fmt_array(points[:, 0])
+        ys = _fmt_array(points[:, 1])
+
+        # Pen up, rapid to path start, pen down
+        out = [
+            line
+            for line in (
+                state.move("G0", z=z_up),
+                state.move("G0", x=xs[0], y=ys[0], f=travel_feed),
+                state.move("G1", z=z_down, f=z_feed),
+            )
+            if line
+        ]
+
+        # First draw move that actually moves carries the draw feed; points
+        # that format the same as the path start would otherwise drop it
+        first = 1
+        while first < len(xs):
+            line = state.move("G1", x=xs[first], y=ys[first], f=draw_feed)
+            first += 1
+            if line:
+                out.append(line)
+                break
+
+        # Remaining draw moves share the feed; only changed axes are written
+        last_x, last_y = state.x, state.y
+        for px, py in zip(xs[first:], ys[first:]):
+            if px != last_x:
+                out.append("G1 X" + px + " Y" + py if py != last_y else "G1 X" + px)
+            elif py != last_y:
+                out.append("G1 Y" + py)
+            last_x, last_y = px, py
+        state.x, state.y = last_x, last_y
+
+        if check:
+            # Z words are always pen up/down, which are inside the Z range,
+            # so a path can only be out of bounds in X or Y
+            emitted = np.round(points, 3)
+            if (
+                (emitted[:, 0] < x_min).any()
+                or (emitted[:, 0] > x_max).any()
+                or (emitted[:, 1] < y_min).any()
+                or (emitted[:, 1] > y_max).any()
+            ):
+                violations.extend(check_gcode_bounds(out, cfg, lineno + 1))
+        lineno += len(out)
+        yield from out
 
     # Footer
-    lines.append(f"G0 Z{_fmt(cfg.z_pen_up)} ; pen up")
+    footer = [state.move("G0", z=z_up, comment="pen up")]
     if cfg.dock_y is not None and cfg.dock_z is not None:
-        lines.append(f"G0 Z0 F{_fmt(cfg.z_travel_speed)} ; retract pen to home [dock]")
-        lines.append(f"G0 Y{_fmt(cfg.dock_y)} F{_fmt(cfg.travel_speed)} ; lower to dock height [dock]")
-        lines.append(f"G0 Z{_fmt(cfg.dock_z)} F{_fmt(cfg.z_travel_speed)} ; seat pen in gasket [dock]")
+        footer += [
+            state.move("G0", z="0", f=z_feed, comment="retract pen to home [dock]"),
+            state.move("G0", y=_fmt(cfg.dock_y), f=travel_feed, comment="lower to dock height [dock]"),
+            state.move("G0", z=_fmt(cfg.dock_z), f=z_feed, comment="seat pen in gasket [dock]"),
+        ]
     else:
-        lines.append(f"G0 X{_fmt(cfg.origin_x)} Y{_fmt(cfg.origin_y)} F{_fmt(cfg.travel_speed)} ; return to origin")
-    lines.append("M2 ; program end")
-
-    return lines
+        footer.append(
+            state.move(
+                "G0", x=_fmt(cfg.origin_x), y=_fmt(cfg.origin_y), f=travel_feed,
+                comment="return to origin",
+            )
+        )
+    footer = [line for line in footer if line]
+    footer.append("M2 ; program end")
+    if check:
+        violations.extend(check_gcode_bounds(footer, cfg, lineno + 1))
+    yield from footer
 
 
 _COORD_RE = re.compile(r"([XYZ])([-\d.]+)", re.IGNORECASE)
+_G01_PREFIXES = ("G0", "G1")
+
 
+@functools.lru_cache(maxsize=8)
+def _envelope(cfg: MachineConfig) -> tuple[float, float, float, float, float, float]:
+    """Safe (x_min, x_max, y_min, y_max, z_min, z_max) for a machine config."""
+    return (
+        cfg.origin_x,
+        cfg.origin_x + cfg.bed_width,
+        cfg.origin_y,
+        cfg.origin_y + cfg.bed_height,
+        min(cfg.z_pen_down, cfg.z_pen_up) - 1.0,  # small tolerance
+        max(cfg.z_pen_down, cfg.z_pen_up) + 1.0,
+    )
 
-def check_gcode_bounds(gcode_lines: list[str], cfg: MachineConfig) -> list[str]:
+
+def check_gcode_bounds(
+    gcode_lines: list[str], cfg: MachineConfig, first_line: int = 1
+) -> list[str]:
     """Check generated GCode coordinates against the configured drawing envelope.
 
     Args:
         gcode_lines: GCode lines (may include comments).
         cfg: Machine configuration defining the safe envelope.
+        first_line: Line number reported for gcode_lines[0].
 
     Returns:
         List of violation strings. Empty if all coordinates are in bounds.
     """
-    x_min = cfg.origin_x
-    x_max = cfg.origin_x + cfg.bed_width
-    y_min = cfg.origin_y
-    y_max = cfg.origin_y + cfg.bed_height
-    z_min = min(cfg.z_pen_down, cfg.z_pen_up) - 1.0  # small tolerance
-    z_max = max(cfg.z_pen_down, cfg.z_pen_up) + 1.0
+    x_min, x_max, y_min, y_max, z_min, z_max = _envelope(cfg)
 
     violations = []
-    for i, line in enumerate(gcode_lines, 1):
+    for i, line in enumerate(gcode_lines, first_line):
         if "[dock]" in line.lower():
             continue
-        # Strip comments
-        clean = line.split(";")[0].upper()
-        if not re.match(r"\s*G[01]\b", clean):
+        # Strip comments; only G0/G1 moves are checked ("G0 X1", not "G10" or "G1X1")
+        clean = line.partition(";")[0].upper().lstrip()
+        if not clean.startswith(_G01_PREFIXES):
+            continue
+        after = clean[2:3]
+        if after and (after.isalnum() or after == "_"):
             continue
         for axis, val_str in _COORD_RE.findall(clean):
             val = float(val_str)
-            lineno = f"line {i}"
-            if axis == "X" and not (x_min <= val <= x_max):
-                violations.append(f"{lineno}: X{val} out of range [{x_min}, {x_max}]")
-            elif axis == "Y" and not (y_min <= val <= y_max):
-                violations.append(f"{lineno}: Y{val} out of range [{y_min}, {y_max}]")
-            elif axis == "Z" and not (z_min <= val <= z_max):
-                violations.append(f"{lineno}: Z{val} out of range [{z_min:.1f}, {z_max:.1f}]")
+            if axis == "X":
+                if not x_min <= val <= x_max:
+                    violations.append(f"line {i}: X{val} out of range [{x_min}, {x_max}]")
+            elif axis == "Y":
+                if not y_min <= val <= y_max:
+                    violations.append(f"line {i}: Y{val} out of range [{y_min}, {y_max}]")
+            elif not z_min <= val <= z_max:
+                violations.append(f"line {i}: Z{val} out of range [{z_min:.1f}, {z_max:.1f}]")
 
     return violations
 
@@ -225,6 +802,14 @@ def convert_file(
     else:
         output_path = Path(output_path)
 
-    gcode_lines = svg_to_gcode(svg_path, cfg)
-    output_path.write_text("\n".join(gcode_lines) + "\n")
+    # Write lines as they are generated rather than building the whole file,
+    # into a temp file so a failed conversion never leaves a truncated job
+    tmp = output_path.with_name(f"{output_path.name}.tmp{os.getpid()}")
+    try:
+        with open(tmp, "w", buffering=1 << 20) as f:
+            f.writelines(line + "\n" for line in _iter_svg_to_gcode(svg_path, cfg))
+        tmp.replace(output_path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
     return output_path
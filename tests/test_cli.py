@@ -0,0 +1,118 @@
+"""Tests for CLI helpers and command flow."""
+
+import argparse
+import os
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+import mugplot.svg_to_gcode as s2g
+from mugplot import cli
+from mugplot.config import Config, MachineConfig
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    return tmp_path / "cache" / "mugplot"
+
+
+class TestRun:
+    def test_out_of_bounds_aborts_without_opening_port(self, monkeypatch):
+        from mugplot.streamer import GCodeStreamer
+
+        def no_connect(self):
+            raise AssertionError("port opened before bounds check")
+
+        monkeypatch.setattr(GCodeStreamer, "connect", no_connect)
+        config = Config(machine=MachineConfig(bed_width=10.0, bed_height=10.0))
+        args = argparse.Namespace(input=str(FIXTURES / "square.svg"))
+
+        with pytest.raises(SystemExit) as exc:
+            cli.cmd_run(args, config)
+        assert exc.value.code == 1
+
+
+class TestConversionCache:
+    def test_miss_then_hit(self, cache_home, tmp_path, monkeypatch):
+        svg = tmp_path / "drawing.svg"
+        svg.write_text((FIXTURES / "square.svg").read_text())
+        mc = MachineConfig()
+
+        first = cli._cached_convert(svg, mc)
+        assert len(list(cache_home.glob("*.gcode"))) == 1
+
+        def no_convert(*args, **kwargs):
+            raise AssertionError("converted on a cache hit")
+
+        monkeypatch.setattr(s2g, "svg_to_gcode", no_convert)
+        assert cli._cached_convert(svg, mc) == first
+
+    def test_svg_or_config_change_is_a_miss(self, cache_home, tmp_path):
+        svg = tmp_path / "drawing.svg"
+        svg.write_text((FIXTURES / "square.svg").read_text())
+        mc = MachineConfig()
+        square, _ = cli._cached_convert(svg, mc)
+
+        moved, _ = cli._cached_convert(svg, replace(mc, origin_x=5.0))
+        assert moved != square
+
+        svg.write_text((FIXTURES / "multipath.svg").read_text())
+        edited, _ = cli._cached_convert(svg, mc)
+        assert edited != square
+        assert len(list(cache_home.glob("*.gcode"))) == 3
+
+    def test_ignored_fields_share_an_entry(self):
+        mc = MachineConfig()
+        svg = FIXTURES / "square.svg"
+        assert cli._cache_key(svg, mc) == cli._cache_key(svg, replace(mc, parallel_threshold=1))
+        assert cli._cache_key(svg, mc) != cli._cache_key(svg, replace(mc, draw_speed=1.0))
+
+    def test_unwritable_cache_still_converts(self, tmp_path, monkeypatch):
+        blocker = tmp_path / "not_a_dir"
+        blocker.write_text("")
+        monkeypatch.setenv("XDG_CACHE_HOME", str(blocker))
+
+        gcode, violations = cli._cached_convert(FIXTURES / "square.svg", MachineConfig())
+        assert gcode[-1].startswith("M2")
+        assert violations == []
+
+    def test_missing_converter_source_still_converts(self, cache_home, tmp_path, monkeypatch):
+        # e.g. installed as bytecode only: no key, so no caching
+        monkeypatch.setattr(cli, "__file__", str(tmp_path / "sourceless" / "cli.py"))
+
+        gcode, violations = cli._cached_convert(FIXTURES / "square.svg", MachineConfig())
+        assert gcode[-1].startswith("M2")
+        assert violations == []
+        assert not cache_home.exists()
+
+    def test_failed_write_leaves_no_temp_file(self, cache_home, monkeypatch):
+        def fail_replace(self, target):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(Path, "replace", fail_replace)
+
+        gcode, _ = cli._cached_convert(FIXTURES / "square.svg", MachineConfig())
+        assert gcode[-1].startswith("M2")
+        assert list(cache_home.iterdir()) == []
+
+    def test_prune_evicts_least_recently_used(self, tmp_path):
+        for i, name in enumerate(["old", "mid", "new"]):
+            path = tmp_path / f"{name}.gcode"
+            path.write_text("x" * 100)
+            os.utime(path, (1000 + i, 1000 + i))
+
+        cli._prune_cache(tmp_path, max_bytes=250)
+        assert sorted(p.stem for p in tmp_path.glob("*.gcode")) == ["mid", "new"]
+
+    def test_prune_evicts_stale_temp_files(self, tmp_path):
+        stale = tmp_path / "abc.tmp4242"
+        stale.write_text("x" * 100)
+        os.utime(stale, (1000, 1000))
+        (tmp_path / "new.gcode").write_text("x" * 100)
+
+        cli._prune_cache(tmp_path, max_bytes=150)
+        assert [p.name for p in tmp_path.iterdir()] == ["new.gcode"]
@@ -0,0 +1,58 @@
+"""Tests for config loading."""
+
+import pytest
+import yaml
+
+from mugplot.config import Config, MachineConfig, _load_config, load_config
+
+CONFIG_YAML = """\
+machine:
+  draw_speed: 600
+  tessellation: afd
+  dock_y: 95.5
+serial:
+  port: /dev/ttyACM0
+  compact: true
+"""
+
+
+class TestMachineConfig:
+    @pytest.mark.parametrize("tessellation", ["levien", "afd"])
+    def test_accepts_known_tessellation(self, tessellation):
+        assert MachineConfig(tessellation=tessellation).tessellation == tessellation
+
+    def test_rejects_unknown_tessellation(self):
+        with pytest.raises(ValueError, match="tessellation"):
+            MachineConfig(tessellation="Levien")
+
+
+class TestLoadConfig:
+    def test_missing_file_gives_defaults(self, tmp_path):
+        assert load_config(tmp_path / "missing.yaml") == Config()
+
+    def test_same_path_is_parsed_once(self, tmp_path):
+        path = tmp_path / "config.yaml"
+        path.write_text(CONFIG_YAML)
+
+        first = load_config(path)
+        assert load_config(str(path)) is first
+        assert first.machine.draw_speed == 600
+        assert first.serial.compact is True
+
+    def test_pure_python_loader_parses_the_same(self, tmp_path, monkeypatch):
+        path = tmp_path / "config.yaml"
+        path.write_text(CONFIG_YAML)
+        expected = load_config(path)
+
+        # PyYAML built without libyaml has no CSafeLoader
+        monkeypatch.delattr(yaml, "CSafeLoader", raising=False)
+        loaders = []
+        real_load = yaml.load
+        monkeypatch.setattr(
+            yaml, "load", lambda f, Loader: loaders.append(Loader) or real_load(f, Loader=Loader)
+        )
+        _load_config.cache_clear()
+        fallback = load_config(path)
+        assert loaders == [yaml.SafeLoader]
+        assert fallback is not expected
+        assert fallback == expected
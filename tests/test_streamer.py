@@ -1,9 +1,22 @@
 """Tests for GCode streamer with mock serial."""
 
+import os
+import select
+import sys
+import threading
+import time
+
 import pytest
 
 from mugplot.config import SerialConfig
-from mugplot.streamer import GCodeStreamer, load_gcode, _strip_gcode
+from mugplot.streamer import (
+    GCodeStreamer,
+    load_gcode,
+    _strip_gcode,
+    _compact_gcode,
+    _open_selector,
+    _set_low_latency,
+)
 
 
 class MockSerial:
@@ -11,6 +24,7 @@ class MockSerial:
 
     def __init__(self, responses=None):
         self._responses = list(responses) if responses else []
+        self._auto_ok = not self._responses
         self._resp_idx = 0
         self.written: list[bytes] = []
         self._in_waiting = 0
@@ -18,8 +32,8 @@ class MockSerial:
     def write(self, data: bytes) -> int:
         self.written.append(data)
         # Queue an 'ok' for each line sent (if no custom responses)
-        if not self._responses:
-            self._responses.append(b"ok\r\n")
+        if self._auto_ok:
+            self._responses.extend([b"ok\r\n"] * data.count(b"\n"))
         return len(data)
 
     def readline(self) -> bytes:
@@ -30,7 +44,8 @@ class MockSerial:
         return b""
 
     def read(self, size: int = 1) -> bytes:
-        return b""
+        # Hand out one whole response per read, like a line arriving at once
+        return self.readline()
 
     def close(self):
         pass
@@ -53,6 +68,9 @@ class TestStripGcode:
     def test_pure_comment(self):
         assert _strip_gcode("; this is a comment") == ""
 
+    def test_semicolon_inside_parens(self):
+        assert _strip_gcode("G1 X5 (a;b) Y10 ; end") == "G1 X5  Y10"
+
 
 class TestStreamBasic:
     def test_stream_single_line(self):
@@ -99,6 +117,26 @@ class TestStreamBasic:
         assert not result.completed
         assert any("ALARM" in e for e in result.errors)
 
+    def test_stream_handles_split_and_coalesced_responses(self):
+        mock = MockSerial(responses=[b"o", b"k\r\nok", b"\r\nok\r\n"])
+        cfg = SerialConfig(rx_buffer_size=128)
+        streamer = GCodeStreamer(cfg, port=mock)
+
+        result = streamer.stream(["G0 X10", "G0 X20", "G0 X30"])
+
+        assert result.lines_sent == 3
+        assert result.completed
+
+    def test_leftover_responses_do_not_carry_into_next_stream(self):
+        mock = MockSerial(responses=[b"ALARM:1\r\nok\r\nok\r\n", b"error:9\r\n"])
+        cfg = SerialConfig(rx_buffer_size=128)
+        streamer = GCodeStreamer(cfg, port=mock)
+
+        assert not streamer.stream(["G0 X10"]).completed
+        result = streamer.stream(["G0 X20"])
+
+        assert result.errors == ["Line 1: error:9"]
+
     def test_progress_callback(self):
         mock = MockSerial(responses=[b"ok\r\n", b"ok\r\n"])
         cfg = SerialConfig(rx_buffer_size=128)
@@ -123,6 +161,43 @@ class TestCharacterCounting:
         assert result.lines_sent == 2
         assert result.completed
 
+    def test_fills_buffer_with_one_write(self):
+        mock = MockSerial()
+        cfg = SerialConfig(rx_buffer_size=128)
+        streamer = GCodeStreamer(cfg, port=mock)
+
+        result = streamer.stream(["G0 X10", "G0 X20", "G0 X30"])
+
+        assert result.completed
+        assert mock.written == [b"G0 X10\nG0 X20\nG0 X30\n"]
+
+    def test_non_ascii_line_is_sent_with_matching_length(self):
+        mock = MockSerial()
+        streamer = GCodeStreamer(SerialConfig(rx_buffer_size=128), port=mock)
+
+        result = streamer.stream(["G1 X1\u00b0", "G0 X2"])
+
+        assert result.completed
+        assert mock.written == [b"G1 X1?\nG0 X2\n"]
+
+    def test_compact_strips_word_spaces(self):
+        mock = MockSerial()
+        cfg = SerialConfig(rx_buffer_size=128, compact=True)
+        streamer = GCodeStreamer(cfg, port=mock)
+
+        result = streamer.stream(["G1 X12.5 Y7 F800", "$H"])
+
+        assert result.completed
+        assert mock.written == [b"G1X12.5Y7F800\n$H\n"]
+
+
+class TestCompactGcode:
+    def test_removes_spaces(self):
+        assert _compact_gcode("G0 X10 Y20 F2000") == "G0X10Y20F2000"
+
+    def test_keeps_system_commands(self):
+        assert _compact_gcode("$J=G91 X1 F100") == "$J=G91 X1 F100"
+
 
 class TestLoadGcode:
     def test_load_strips_comments(self, tmp_path):
@@ -131,6 +206,22 @@ class TestLoadGcode:
         lines = load_gcode(gcode)
         assert lines == ["G21", "G0 X10"]
 
+    def test_load_empty_file(self, tmp_path):
+        gcode = tmp_path / "empty.gcode"
+        gcode.write_text("")
+        assert load_gcode(gcode) == []
+
+    def test_load_rejects_non_ascii_outside_comments(self, tmp_path):
+        gcode = tmp_path / "bad.gcode"
+        gcode.write_bytes("G21 ; réglage\nG1 X1\xb0\n".encode("latin-1"))
+        with pytest.raises(ValueError, match="line 2"):
+            load_gcode(gcode)
+
+    def test_load_cr_line_endings(self, tmp_path):
+        gcode = tmp_path / "cr.gcode"
+        gcode.write_bytes(b"G21\rG90 ; abs\rG1 X1\r\nG1 X2\r")
+        assert load_gcode(gcode) == ["G21", "G90", "G1 X1", "G1 X2"]
+
 
 class TestRealTimeCommands:
     def test_query_status(self):
@@ -150,3 +241,72 @@ class TestRealTimeCommands:
 
         streamer.soft_reset()
         assert b"\x18" in mock.written
+
+
+class TestLowLatency:
+    def test_ignores_port_without_tty(self, tmp_path):
+        with open(tmp_path / "not_a_tty", "wb") as f:
+            assert _set_low_latency(f) is False
+
+    def test_ignores_port_without_fileno(self):
+        assert _set_low_latency(MockSerial()) is False
+
+
+def _fake_controller(fd, received, stop):
+    """Ack each line on a pty master, alternating coalesced and split writes."""
+    buf = b""
+    split = False
+    while not stop.is_set():
+        ready, _, _ = select.select([fd], [], [], 0.01)
+        if not ready:
+            continue
+        buf += os.read(fd, 4096)
+        pending = b""
+        while b"\n" in buf:
+            line, buf = buf.split(b"\n", 1)
+            received.append(line)
+            pending += b"ok\r\n"
+        if not pending:
+            continue
+        if split:
+            os.write(fd, pending[:1])  # an ack split across reads
+            time.sleep(0.002)
+            os.write(fd, pending[1:])
+        else:
+            os.write(fd, pending)  # usually several acks in one read
+        split = not split
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs a pty")
+class TestStreamOverPty:
+    def test_stream_through_selector(self):
+        import serial
+        import tty
+
+        master, slave = os.openpty()
+        tty.setraw(slave)
+        received = []
+        stop = threading.Event()
+        controller = threading.Thread(
+            target=_fake_controller, args=(master, received, stop), daemon=True
+        )
+        controller.start()
+        port = serial.Serial(os.ttyname(slave), 115200, timeout=2)
+        try:
+            selector = _open_selector(port)
+            assert selector is not None  # the production (non-blocking) path
+            selector.close()
+
+            lines = [f"G1 X{i}.5 Y{i % 7}" for i in range(300)]
+            result = GCodeStreamer(SerialConfig(rx_buffer_size=64), port=port).stream(lines)
+
+            assert result.completed
+            assert result.lines_sent == 300
+            assert not result.errors
+            assert received == [line.encode() for line in lines]
+        finally:
+            stop.set()
+            controller.join()
+            port.close()
+            os.close(master)
+            os.close(slave)
@@ -1,11 +1,28 @@
 """Tests for SVG to GCode conversion."""
 
+import math
+import os
+from dataclasses import replace
 from pathlib import Path
 
+import numpy as np
 import pytest
+from svgpathtools import Arc, CubicBezier, QuadraticBezier, svg2paths2
 
+import mugplot.svg_to_gcode as s2g
 from mugplot.config import MachineConfig
-from mugplot.svg_to_gcode import svg_to_gcode, convert_file
+from mugplot.svg_to_gcode import (
+    svg_to_gcode,
+    convert_file,
+    check_gcode_bounds,
+    _cached_svg2paths2,
+    _flatten_path,
+    _flatten_paths_parallel,
+    _flatten_quad,
+    _fmt_array,
+    _linearize_segment,
+    _simplify_colinear,
+)
 
 FIXTURES = Path(__file__).parent / "fixtures"
 
@@ -81,6 +98,45 @@ class TestSquareSVG:
         assert 100.0 in y_values
 
 
+class TestModalOutput:
+    def test_unchanged_axes_are_omitted(self, cfg):
+        cmds = _parse_gcode(svg_to_gcode(FIXTURES / "square.svg", cfg))
+        # Square edges move one axis at a time
+        assert any(c.startswith("G1 Y") for c in cmds)
+        assert any(c.startswith("G1 X") and "Y" not in c for c in cmds)
+
+    def test_feed_only_written_when_it_changes(self, cfg):
+        feed = None
+        for cmd in _parse_gcode(svg_to_gcode(FIXTURES / "multipath.svg", cfg)):
+            for word in cmd.split():
+                if word.startswith("F"):
+                    assert word != feed, f"redundant {word} in {cmd!r}"
+                    feed = word
+
+    def test_draw_feed_survives_points_that_format_equal(self, cfg, tmp_path):
+        svg = tmp_path / "jitter.svg"
+        svg.write_text(
+            '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 60 150">'
+            '<path d="M 10 10 L 10.0004 10 L 10.0001 10 L 10.0002 10.0001 L 50 10 L 50 30"/>'
+            "</svg>"
+        )
+        feed = None
+        draws = 0
+        for cmd in _parse_gcode(svg_to_gcode(svg, cfg)):
+            words = cmd.split()
+            feed = next((w for w in words if w.startswith("F")), feed)
+            if words[0] == "G1" and any(w[0] in "XY" for w in words[1:]):
+                assert feed == "F800", f"{cmd!r} runs at {feed}"
+                draws += 1
+        assert draws == 2
+
+    def test_no_pen_up_when_already_up(self, cfg):
+        cmds = _parse_gcode(svg_to_gcode(FIXTURES / "square.svg", cfg))
+        z_moves = [c for c in cmds if c.startswith(("G0 Z", "G1 Z"))]
+        # header pen up, pen down, footer pen up
+        assert [c.split()[1] for c in z_moves] == ["Z5", "Z0", "Z5"]
+
+
 class TestCurveSVG:
     def test_curve_linearization_produces_multiple_points(self, cfg):
         lines = svg_to_gcode(FIXTURES / "curve.svg", cfg)
@@ -89,6 +145,154 @@ class TestCurveSVG:
         assert len(draw_moves) > 2, "Curve should be linearized into multiple segments"
 
 
+def _max_deviation(segment, points, samples=500):
+    """Largest distance from points sampled on segment to the polyline."""
+    poly = [(segment.start.real, segment.start.imag)] + list(points)
+    worst = 0.0
+    for i in range(samples + 1):
+        p = segment.point(i / samples)
+        best = math.inf
+        for (ax, ay), (bx, by) in zip(poly, poly[1:]):
+            dx, dy = bx - ax, by - ay
+            seg_len2 = dx * dx + dy * dy
+            t = 0.0 if seg_len2 == 0 else ((p.real - ax) * dx + (p.imag - ay) * dy) / seg_len2
+            t = min(1.0, max(0.0, t))
+            best = min(best, math.hypot(p.real - ax - t * dx, p.imag - ay - t * dy))
+        worst = max(worst, best)
+    return worst
+
+
+class TestFlattening:
+    @pytest.mark.parametrize(
+        "segment",
+        [
+            CubicBezier(10 + 75j, 10 + 30j, 50 + 30j, 50 + 75j),
+            CubicBezier(0j, 60 + 60j, 0 + 60j, 60 + 0j),  # self-intersecting
+            QuadraticBezier(0j, 30 + 80j, 60 + 0j),
+            QuadraticBezier(0j, 20 + 0j, 10 + 0j),  # collinear, doubles back
+        ],
+    )
+    def test_within_tolerance(self, segment):
+        points = _linearize_segment(segment, 0.1)
+        assert points[-1] == (segment.end.real, segment.end.imag)
+        assert _max_deviation(segment, points) <= 0.1
+
+    @pytest.mark.parametrize(
+        "segment",
+        [
+            Arc(0j, 30 + 10j, 30, True, True, 40 + 20j),
+            Arc(0j, 5 + 5j, 0, False, False, 10 + 0j),
+            Arc(10 + 0j, 100 + 3j, -45, True, False, 0 + 10j),  # thin ellipse
+            Arc(0j, 0.05 + 0.05j, 0, False, True, 0.1 + 0j),  # smaller than tolerance
+        ],
+    )
+    def test_arc_within_tolerance(self, segment):
+        points = _linearize_segment(segment, 0.1)
+        assert points[-1] == (segment.end.real, segment.end.imag)
+        assert _max_deviation(segment, points) <= 0.1
+
+    def test_output_within_tolerance_of_svg(self, cfg, tmp_path):
+        # Flattening and simplification together, as emitted;
+        # with the full tolerance spent on flattening this came out 0.105 mm off
+        svg = tmp_path / "loop.svg"
+        svg.write_text(
+            '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 60 150">'
+            '<path d="M 7.6 29.4 C 42.3 8.6 45.7 16.1 19.5 9.2" fill="none"/>'
+            "</svg>"
+        )
+        cfg = replace(cfg, flip_y=False)
+        pos = None
+        points = []
+        for line in _parse_gcode(svg_to_gcode(svg, cfg)):
+            words = {w[0]: float(w[1:]) for w in line.split()[1:]}
+            if line.split()[0] not in ("G0", "G1") or not {"X", "Y"} & words.keys():
+                continue
+            if line.startswith("G1") and not points:
+                points.append(pos)  # where the pen went down
+            pos = (words.get("X", pos and pos[0]), words.get("Y", pos and pos[1]))
+            if line.startswith("G1"):
+                points.append(pos)
+        points = [(x - cfg.origin_x, y - cfg.origin_y) for x, y in points]
+        (path,), _, _ = svg2paths2(str(svg))
+        # Plus the 3-decimal rounding of the emitted coordinates
+        for segment in path:
+            assert _max_deviation(segment, points) <= cfg.curve_tolerance + 0.001
+
+    def test_nearly_straight_curve_is_one_line(self):
+        segment = CubicBezier(0j, 10 + 0.05j, 20 - 0.05j, 30 + 0j)
+        assert _linearize_segment(segment, 0.1) == [(30.0, 0.0)]
+
+    def test_quad_with_control_at_chord_midpoint(self):
+        # Second difference is rounding noise; used to divide by zero
+        out = []
+        _flatten_quad(152.213132, 68.146385, 89.7659675, 51.586194, 27.318803, 35.026003, 0.09, out)
+        assert out == [(27.318803, 35.026003)]
+
+    @pytest.mark.parametrize(
+        "segment",
+        [
+            CubicBezier(10 + 75j, 10 + 30j, 50 + 30j, 50 + 75j),
+            CubicBezier(0j, 60 + 60j, 0 + 60j, 60 + 0j),
+            CubicBezier(0j, 100 + 0j, 0j, 100 + 0j),  # collinear, doubles back
+        ],
+    )
+    def test_afd_within_tolerance(self, segment):
+        points = _linearize_segment(segment, 0.1, "afd")
+        assert points[-1] == (segment.end.real, segment.end.imag)
+        assert _max_deviation(segment, points) <= 0.1
+
+
+class TestSimplifyColinear:
+    def test_drops_points_on_straight_run(self):
+        pts = np.array([[0, 0], [1, 0.01], [2, 0], [3, -0.01], [4, 0]], dtype=float)
+        assert _simplify_colinear(pts, 0.05).tolist() == [[0, 0], [4, 0]]
+
+    def test_keeps_corners(self):
+        pts = np.array([[0, 0], [5, 0], [10, 0], [10, 5], [10, 10]], dtype=float)
+        assert _simplify_colinear(pts, 0.05).tolist() == [[0, 0], [10, 0], [10, 10]]
+
+    def test_keeps_reversal_along_the_same_line(self):
+        pts = np.array([[0, 0], [10, 0], [5, 0]], dtype=float)
+        assert _simplify_colinear(pts, 0.05).tolist() == [[0, 0], [10, 0], [5, 0]]
+
+
+class TestFmtArray:
+    def test_matches_scalar_format(self):
+        values = np.array([0.0, 10.0, 12.5, 12.3456, -3.25, 0.001, 99.9999])
+        assert _fmt_array(values) == ["0", "10", "12.5", "12.346", "-3.25", "0.001", "100"]
+
+    def test_tiny_negative_is_zero(self):
+        assert _fmt_array(np.array([-0.0004])) == ["0"]
+
+
+class TestParallelFlatten:
+    def test_matches_serial_in_order(self):
+        paths, _, _ = svg2paths2(str(FIXTURES / "multipath.svg"))
+        parallel = _flatten_paths_parallel(paths * 4, 0.1, "levien")
+        serial = [_flatten_path(path, 0.1) for path in paths * 4]
+        assert [a.tolist() for a in parallel] == [b.tolist() for b in serial]
+
+    def test_low_threshold_gives_same_gcode(self, cfg, monkeypatch):
+        calls = []
+        real = s2g._flatten_paths_parallel
+
+        def spy(*args):
+            calls.append(len(args[0]))
+            return real(*args)
+
+        monkeypatch.setattr(s2g.os, "cpu_count", lambda: 4)
+        monkeypatch.setattr(s2g, "_flatten_paths_parallel", spy)
+        parallel_cfg = replace(cfg, parallel_threshold=1)
+        serial_cfg = replace(cfg, parallel_threshold=1_000_000)
+        assert svg_to_gcode(FIXTURES / "multipath.svg", parallel_cfg) == svg_to_gcode(
+            FIXTURES / "multipath.svg", serial_cfg
+        )
+        assert len(calls) == 1
+
+    def test_workers_are_not_forked(self):
+        assert s2g._pool_context().get_start_method() in ("forkserver", "spawn")
+
+
 class TestMultipathSVG:
     def test_multiple_paths_have_pen_lifts(self, cfg):
         lines = svg_to_gcode(FIXTURES / "multipath.svg", cfg)
@@ -98,6 +302,32 @@ class TestMultipathSVG:
         assert len(pen_ups) >= 3  # initial + 2 paths + footer
 
 
+class TestCheckBounds:
+    def test_in_bounds_has_no_violations(self, cfg):
+        assert check_gcode_bounds(["G21", "G0 X10 Y20 Z5", "G1 X60 Y160 Z0"], cfg) == []
+
+    def test_reports_each_axis_with_line_number(self, cfg):
+        lines = ["G21", "G1 X61 Y5", "G0 Z7 ; too high", "G1 X5 Y15"]
+        violations = check_gcode_bounds(lines, cfg)
+        assert violations == [
+            "line 2: X61.0 out of range [0.0, 60.0]",
+            "line 2: Y5.0 out of range [10.0, 160.0]",
+            "line 3: Z7.0 out of range [-1.0, 6.0]",
+        ]
+
+    def test_skips_dock_moves_and_non_motion_lines(self, cfg):
+        lines = ["G0 Y200 ; lower to dock height [dock]", "G10 L2 P1 X900", "M2"]
+        assert check_gcode_bounds(lines, cfg) == []
+
+    @pytest.mark.parametrize("fixture", ["square.svg", "multipath.svg", "curve.svg"])
+    def test_fused_check_matches_post_check(self, cfg, fixture):
+        small = replace(cfg, bed_width=30.0, bed_height=50.0)
+        lines, violations = svg_to_gcode(FIXTURES / fixture, small, check_bounds=True)
+        assert lines == svg_to_gcode(FIXTURES / fixture, small)
+        assert violations
+        assert violations == check_gcode_bounds(lines, small)
+
+
 class TestConvertFile:
     def test_writes_gcode_file(self, cfg, tmp_path):
         output = tmp_path / "test.gcode"
@@ -115,3 +345,27 @@ class TestConvertFile:
         result = convert_file(svg, cfg=cfg)
         assert result == tmp_path / "drawing.gcode"
         assert result.exists()
+
+    def test_failed_conversion_leaves_no_output(self, cfg, tmp_path, monkeypatch):
+        def fail(*args):
+            raise RuntimeError("boom")
+
+        output = tmp_path / "out.gcode"
+        output.write_text("previous job\n")
+        monkeypatch.setattr(s2g, "_simplify_colinear", fail)
+        with pytest.raises(RuntimeError):
+            convert_file(FIXTURES / "multipath.svg", output, cfg)
+        assert output.read_text() == "previous job\n"
+        assert list(tmp_path.iterdir()) == [output]
+
+    def test_reparses_when_svg_changes(self, cfg, tmp_path):
+        svg = tmp_path / "drawing.svg"
+        svg.write_text((FIXTURES / "square.svg").read_text())
+        first = svg_to_gcode(svg, cfg)
+        assert svg_to_gcode(svg, cfg) == first
+        assert _cached_svg2paths2.cache_info().hits >= 1
+
+        svg.write_text((FIXTURES / "multipath.svg").read_text())
+        st = svg.stat()
+        os.utime(svg, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        assert svg_to_gcode(svg, cfg) == svg_to_gcode(FIXTURES / "multipath.svg", cfg)